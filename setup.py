@@ -21,6 +21,7 @@
 from setuptools import setup, find_packages
 
 requires = [
+        'numpy',
         ]
 
 setup(
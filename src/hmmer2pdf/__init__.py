@@ -19,8 +19,10 @@
 # SOFTWARE.
 
 import sys
-import re
+import io
 import collections
+import dataclasses
+import functools
 import tempfile
 import shutil
 import os
@@ -28,6 +30,8 @@ import subprocess
 import math
 import argparse
 
+import numpy as np
+
 # CONSTANTS ########################################################################################
 
 latex_header = """\\documentclass[tikz,crop,10pt]{standalone}
@@ -74,11 +78,36 @@ tikz_settings = """    [
     trans/.style=[-arr],
     ]"""
 
+latex_footer = '    \\end{tikzpicture}\n\end{document}\n'
+
+# The static document blocks, pre-encoded once for the binary TeX output stream
+latex_header_b  = latex_header.encode('ascii')
+tikz_settings_b = tikz_settings.encode('ascii')
+latex_footer_b  = latex_footer.encode('ascii')
+
+# Row layout of the emission probability tables; amino acids are shown in two
+# columns of ten, nucleotides in a single column of four
+aa_rows = [ ('A','M'), ('C','N'), ('D','P'), ('E','Q'), ('F','R'), ('G','S'), ('H','T'), ('I','V'), ('K','W'), ('L','Y') ]
+nt_rows = [ 'A', 'C', 'G', 'T' ]
+
 
 # TYPE DEFINITIONS #################################################################################
 
-SubHMM = collections.namedtuple('SubHMM', ['m_em', 'ins_em','trans', 'm_ent', 'ins_ent'])
-HMM = collections.namedtuple('HMM', ['subs', 'norm_m_ent', 'norm_ins_ent'])
+@dataclasses.dataclass
+class Subs:
+    """ Structure-of-arrays layout of the per position probability model. Row 0
+    corresponds to the begin state, whose match emission and entropy entries
+    are NaN. """
+    m_em    : np.ndarray # Match state log emission probabilities, one row per position
+    ins_em  : np.ndarray # Insert state log emission probabilities, one row per position
+    trans   : np.ndarray # Transition log probabilities, one row of seven per position
+    m_ent   : np.ndarray # Match state entropies [bits]
+    ins_ent : np.ndarray # Insert state entropies [bits]
+
+    def __len__(self):
+        return len(self.ins_em)
+
+HMM = collections.namedtuple('HMM', ['subs', 'norm_m_ent', 'norm_ins_ent', 'trans_probs', 'trans_lw', 'm_fill', 'ins_fill', 'm_em_strs', 'm_em_fills', 'ins_em_strs', 'ins_em_fills'])
 
 class HMMParseException(RuntimeError):
     pass
@@ -92,148 +121,178 @@ class NoLaTeXException(RuntimeError):
 # FUNCTION DEFINITIONS #############################################################################
 
 def ent(x):
-    """ Entropy [bits] given a vector of log probabilities """
-    x     = [ math.exp(-val) for val in x ]
-    logs  = [ math.log(val, 2) for val in x ]
-    prods = [ a * b for a,b in zip(x, logs) ]
-    return - sum(prods)
+    """ Entropies [bits] given a matrix with one row of log probabilities per state """
+    probs = np.exp(-np.asarray(x))
+    return - (probs * np.log2(probs)).sum(axis=1)
 
-def parseMatchEmProbs(s, m_num):
+def parseMatchEmProbs(s, m_num, alph_size):
     """ Parses a match state emission probability row in the hmmer hmm file format """
-    #                           m_num      aa em probs...  MAP.... CONS.......  RF.......... MM.. CS..........
-    alph_size=None
-    if re.match('^ +' + str(m_num) + '( +\d+[.]\d+){20} +(\d+|-) ([a-zA-Z.]|-) ([a-zA-Z.]|-) [m-] ([a-zA-Z.]|-)$', s):
-        alph_size = 20 # Protein
-    elif re.match('^ +' + str(m_num) + '( +\d+[.]\d+){4} +(\d+|-) ([a-zA-Z.]|-) ([a-zA-Z.]|-) [m-] ([a-zA-Z.]|-)$', s):
-        alph_size = 4  # DNA
-    else:
+    toks = s.split()
+    # State number plus emission probabilities plus MAP/CONS/RF/MM/CS annotations
+    if len(toks) != alph_size + 6 or toks[0] != str(m_num) or not all(tok.replace('.', '', 1).isdigit() for tok in toks[1:(alph_size+1)]):
         raise HMMParseException("Match state pos " + str(m_num) + ": Invalid emission probablity string: '" + s + "'")
-    return [ float(val) for val in s.split()[1:(alph_size+1)] ]
+    return [ float(val) for val in toks[1:(alph_size+1)] ]
 
-def parseInsEmProbs(s):
+def parseInsEmProbs(s, alph_size):
     """ Parses a insert state emission probability row in the hmmer hmm file format """
-    if not any([
-        re.match('^ +( +\d+[.]\d+){20}$', s), # Protein
-        re.match('^ +( +\d+[.]\d+){4}$', s),  # DNA
-        ]):
+    toks = s.split()
+    if len(toks) != alph_size or not all(tok.replace('.', '', 1).isdigit() for tok in toks):
         raise HMMParseException("Invalid insertion state emission probablity string: '" + s + "'")
-    return [ float(val) for val in s.split() ]
+    return [ float(val) for val in toks ]
 
 def parseTransProbs(s):
     """ Parses a transition probability row in the hmmer hmm file format """
-    if not re.match('^ +( +\d+[.]\d+){2} +(\d+[.]\d+|[*])( +\d+[.]\d+){3} +(\d+[.]\d+|[*])$', s):
+    toks = s.split()
+    if len(toks) != 7 or not all(tok == '*' or tok.replace('.', '', 1).isdigit() for tok in toks):
         raise HMMParseException("Invalid transition probablity string: '" + s + "'")
-    return [ (lambda v : float('inf') if v=='*' else float(v))(val) for val in s.split() ]
+    return [ math.inf if val == '*' else float(val) for val in toks ]
 
-def rescale(subs, getter):
-    """ Rescales values across all subs, getter defines which member to rescale """
-    vals = [ getter(sub) for sub in subs ]
-    min_val = min([val for val in vals if not val is None])
-    max_val = max([val for val in vals if not val is None])
+def rescale(vals):
+    """ Rescales an array of values to the unit interval, ignoring NaN entries """
+    min_val = np.nanmin(vals)
+    max_val = np.nanmax(vals)
     val_range = max_val - min_val if max_val != min_val else 1
-    res = [ (lambda x:None if x is None else (x - min_val) / (val_range))(val) for val in vals ]
-    return res
+    return (vals - min_val) / val_range
+
+def _fillPercent(norm_ents):
+    """ Anti proportional color fill percentages given normalized entropies - low entropy -> high color intensity """
+    return np.where(np.isnan(norm_ents), 0, np.floor(100 * (1 - norm_ents))).astype(int)
 
 def parseHMMFile(instream):
     """ Parses a hmmer HMM file given a file input object """
-    subs = list()
-    in_hmm = False
-    raw = [ line.rstrip('\n') for line in instream ]
-
-    # Read the begin state insert emission and transition probabilities
-    gen = (i for i in range(len(raw)))
-    for i in gen:
-        line = raw[i]
-        if re.match('^HMM\s+A\s+', line):
-            next(gen)
-            in_hmm = True
-            continue
-        if in_hmm:
-            if re.match('^\s+COMPO\s+', line):
-                i += 1
-            ins_em   = parseInsEmProbs(raw[i])
-            subs += [ SubHMM(None, ins_em, parseTransProbs(raw[i+1]), None, ent(ins_em)) ]
-            i += 2
-            break
-
-    hmm_position = 1
-    for i in range(i, len(raw), 3):
-        if re.match('^//', raw[i]):
-            break
-        match_em = parseMatchEmProbs(raw[i], hmm_position)
-        ins_em   = parseInsEmProbs(raw[i+1])
-        subs += [ SubHMM(match_em, ins_em, parseTransProbs(raw[i+2]), ent(match_em), ent(ins_em)) ]
-        hmm_position += 1
-    return HMM(subs, rescale(subs, lambda x : x.m_ent), rescale(subs, lambda x : x.ins_ent))
+    m_em_rows   = list()
+    ins_em_rows = list()
+    trans_rows  = list()
+
+    # Skip the header up to and including the alphabet / annotation lines,
+    # detecting the alphabet size once from the 'HMM' column header
+    for line in instream:
+        if line.startswith('HMM '):
+            toks = line.split()
+            if toks[1:2] == ['A']:
+                alph_size = len(toks) - 1
+                break
+    else:
+        raise HMMParseException("Unexpected end of file while searching for the probability model")
+    if alph_size not in (4, 20):
+        raise HMMParseException("Unsupported alphabet of size " + str(alph_size))
+
+    try:
+        next(instream)
+
+        # Read the begin state insert emission and transition probabilities,
+        # skipping the optional COMPO line
+        line = next(instream)
+        if line.lstrip().startswith('COMPO '):
+            line = next(instream)
+        ins_em_rows.append(parseInsEmProbs(line, alph_size))
+        trans_rows.append(parseTransProbs(next(instream)))
+
+        # Read three lines per HMM position until the end marker
+        hmm_position = 1
+        while True:
+            line = next(instream)
+            if line.startswith('//'):
+                break
+            m_em_rows.append(parseMatchEmProbs(line, hmm_position, alph_size))
+            ins_em_rows.append(parseInsEmProbs(next(instream), alph_size))
+            trans_rows.append(parseTransProbs(next(instream)))
+            hmm_position += 1
+    except StopIteration:
+        raise HMMParseException("Unexpected end of file while reading the probability model")
+
+    # Stack the parsed rows into the structure-of-arrays layout, padding the
+    # begin state match emission row with NaN, and compute all state entropies
+    # in one vectorized pass each
+    m_em = np.full((len(ins_em_rows), alph_size), np.nan)
+    m_em[1:] = m_em_rows
+    ins_em = np.array(ins_em_rows)
+    subs = Subs(m_em, ins_em, np.array(trans_rows), ent(m_em), ent(ins_em))
+    norm_m_ent   = rescale(subs.m_ent)
+    norm_ins_ent = rescale(subs.ins_ent)
+
+    # Precompute the per position transition probabilities, arc line widths
+    # and state fill percentages needed during drawing in one batch each
+    trans_probs = np.exp(-subs.trans)
+    trans_lw    = 1 + 2 * trans_probs
+    m_fill      = _fillPercent(norm_m_ent)
+    ins_fill    = _fillPercent(norm_ins_ent)
+
+    # Pre-render the emission probability and table fill strings for all
+    # positions in a handful of C-level passes; the match state arrays are
+    # indexed with pos-1 since the begin state has no match emissions
+    m_probs   = np.exp(-subs.m_em[1:])
+    ins_probs = np.exp(-subs.ins_em)
+    m_em_strs    = np.char.mod('%.3f', m_probs)
+    ins_em_strs  = np.char.mod('%.3f', ins_probs)
+    m_em_fills   = np.char.add('mcolor!', np.char.mod('%d', np.floor(100 * m_probs).astype(int)))
+    ins_em_fills = np.char.add('icolor!', np.char.mod('%d', np.floor(100 * ins_probs).astype(int)))
+    return HMM(subs, norm_m_ent, norm_ins_ent, trans_probs, trans_lw, m_fill, ins_fill,
+            m_em_strs, m_em_fills, ins_em_strs, ins_em_fills)
 
 def openLaTeX():
     """ Create a temporary directory with a TeX file. Writes header and settings to the file. Returns file handle. """
     tdir = tempfile.mkdtemp()
-    out = open(tdir + '/hmm.tex', 'w')
-    out.write(latex_header)
-    out.write(tikz_settings)
+    # Binary mode with a large buffer avoids the per-write text codec path
+    out = open(tdir + '/hmm.tex', 'wb', buffering = 1<<20)
+    out.write(latex_header_b)
+    out.write(tikz_settings_b)
     return tdir, out
 
 def closeLaTeX(out):
     """ Write the footer and close the TeX output file. """
-    out.write('    \\end{tikzpicture}\n\end{document}\n')
+    out.write(latex_footer_b)
     out.close()
 
-def drawTrans(out, hmm, pos):
-    """ Draw the state transition arcs for the states correspoding to position 'pos' """
-    vals  = [ math.exp(-val) for val in hmm[pos].trans ]
-    lw_co = [ 1 + 2 * val for val in vals ]
-    if not vals[0] is None and vals[0] > 0:
-        out.write('        \\draw [trans, line width=' + str(lw_co[0]) + '\\lwidth] (m' + str(pos) + ') -- (m'  + str(pos+1) + ') node [prob] {$' + "%.3f" % vals[0] + '$};\n')
-    if not vals[1] is None and vals[1] > 0:
-        out.write('        \\draw [trans, line width=' + str(lw_co[1]) + '\\lwidth] (m' + str(pos) + ') -- (i'  + str(pos) + ') node [prob] {$' + "%.3f" % vals[1] + '$};\n')
-    if not vals[2] is None and vals[2] > 0:
-        out.write('        \\draw [trans, line width=' + str(lw_co[2]) + '\\lwidth] (m' + str(pos) + ') -- (d'  + str(pos+1) + ') node [dprob] {$' + "%.3f" % vals[2] + '$};\n')
-    if not vals[3] is None and vals[3] > 0:
-        out.write('        \\draw [trans, line width=' + str(lw_co[3]) + '\\lwidth] (i' + str(pos) + ') -- (m'  + str(pos+1) + ') node [prob] {$' + "%.3f" % vals[3] + '$};\n')
-    if not vals[4] is None and vals[4] > 0:
-        out.write('        \\draw [trans, line width=' + str(lw_co[4]) + '\\lwidth] (i' + str(pos) + ') to [out=60,in=120,looseness=8] node [loopprob] {$' + "%.3f" % vals[4] + '$} (i'  + str(pos) + ') ;\n')
-    if not vals[5] is None and vals[5] > 0:
-        out.write('        \\draw [trans, line width=' + str(lw_co[5]) + '\\lwidth] (d' + str(pos) + ') -- (m'  + str(pos+1) + ') node [dprob] {$' + "%.3f" % vals[5] + '$};\n')
-    if not vals[6] is None and vals[6] > 0:
-        out.write('        \\draw [trans, line width=' + str(lw_co[6]) + '\\lwidth] (d' + str(pos) + ') -- (d'  + str(pos+1) + ') node [prob] {$' + "%.3f" % vals[6] + '$};\n')
-
-def draw_eprobs(out, hmm, pos, getter, pos_string, color):
-    """ Draw the state emission probability tables for the states correspoding
-    to position 'pos'. 'getter' defines whether insert oder match states are
-    drawn."""
-    probs        = [ math.exp(-val) for val in getter(hmm.subs[pos]) ]
-    prob_strings = [ "%.3f" % val for val in probs ]
-    prob_colors  = [ color + '!' + str(math.floor(100*val)) for val in probs ]
-
-    if len(probs)==20:
-        out.write("""
-        \\matrix [inner sep=.05mm, outer sep=0pt, """ + pos_string + str(pos) + """, matrix of nodes, nodes={inner sep=.2mm, font=\\tiny, minimum size=1.0em}, row sep=.04mm] (m) {%
-            |[circle, fill=""" + prob_colors[0] + """]|A & $""" + prob_strings[0] + """$ & |[circle, fill=""" + prob_colors[10] + """]|M & $""" + prob_strings[10] + """$\\\\
-            |[circle, fill=""" + prob_colors[1] + """]|C & $""" + prob_strings[1] + """$ & |[circle, fill=""" + prob_colors[11] + """]|N & $""" + prob_strings[11] + """$\\\\
-            |[circle, fill=""" + prob_colors[2] + """]|D & $""" + prob_strings[2] + """$ & |[circle, fill=""" + prob_colors[12] + """]|P & $""" + prob_strings[12] + """$\\\\
-            |[circle, fill=""" + prob_colors[3] + """]|E & $""" + prob_strings[3] + """$ & |[circle, fill=""" + prob_colors[13] + """]|Q & $""" + prob_strings[13] + """$\\\\
-            |[circle, fill=""" + prob_colors[4] + """]|F & $""" + prob_strings[4] + """$ & |[circle, fill=""" + prob_colors[14] + """]|R & $""" + prob_strings[14] + """$\\\\
-            |[circle, fill=""" + prob_colors[5] + """]|G & $""" + prob_strings[5] + """$ & |[circle, fill=""" + prob_colors[15] + """]|S & $""" + prob_strings[15] + """$\\\\
-            |[circle, fill=""" + prob_colors[6] + """]|H & $""" + prob_strings[6] + """$ & |[circle, fill=""" + prob_colors[16] + """]|T & $""" + prob_strings[16] + """$\\\\
-            |[circle, fill=""" + prob_colors[7] + """]|I & $""" + prob_strings[7] + """$ & |[circle, fill=""" + prob_colors[17] + """]|V & $""" + prob_strings[17] + """$\\\\
-            |[circle, fill=""" + prob_colors[8] + """]|K & $""" + prob_strings[8] + """$ & |[circle, fill=""" + prob_colors[18] + """]|W & $""" + prob_strings[18] + """$\\\\
-            |[circle, fill=""" + prob_colors[9] + """]|L & $""" + prob_strings[9] + """$ & |[circle, fill=""" + prob_colors[19] + """]|Y & $""" + prob_strings[19] + """$\\\\
-        };
-        \\draw [rounded corners=.1mm] (m.south west) rectangle (m.north east);\n""")
-    elif len(probs)==4:
-        out.write("""
-        \\matrix [inner sep=.05mm, outer sep=0pt, """ + pos_string + str(pos) + """, matrix of nodes, nodes={inner sep=.2mm, font=\\tiny, minimum size=1.0em}, row sep=.04mm] (m) {%
-            |[circle, fill=""" + prob_colors[0] + """]|A & $""" + prob_strings[0] + """$ \\\\
-            |[circle, fill=""" + prob_colors[1] + """]|C & $""" + prob_strings[1] + """$ \\\\
-            |[circle, fill=""" + prob_colors[2] + """]|G & $""" + prob_strings[2] + """$ \\\\
-            |[circle, fill=""" + prob_colors[3] + """]|T & $""" + prob_strings[3] + """$ \\\\
-        };
-        \\draw [rounded corners=.1mm] (m.south west) rectangle (m.north east);\n""")
-
-
-def drawPosition(out, hmm, pos):
-    """ Draw the state nodes and emission probability tables for position 'pos' """
+@functools.lru_cache(maxsize = 4096)
+def _fmt3(val):
+    """ Format a probability with three decimal places, caching repeated values """
+    return f'{val:.3f}'
+
+@functools.lru_cache(maxsize = None)
+def _cfill(color, pct):
+    """ TikZ fill specification given a color name and an intensity percentage """
+    return f'{color}!{pct}'
+
+def drawTrans(parts, hmm, pos):
+    """ Append the state transition arcs for the states correspoding to position 'pos' to 'parts' """
+    vals  = hmm.trans_probs[pos]
+    lw_co = hmm.trans_lw[pos]
+    if vals[0] > 0:
+        parts.append(f'        \\draw [trans, line width={lw_co[0]}\\lwidth] (m{pos}) -- (m{pos+1}) node [prob] {{${_fmt3(vals[0])}$}};\n')
+    if vals[1] > 0:
+        parts.append(f'        \\draw [trans, line width={lw_co[1]}\\lwidth] (m{pos}) -- (i{pos}) node [prob] {{${_fmt3(vals[1])}$}};\n')
+    if vals[2] > 0:
+        parts.append(f'        \\draw [trans, line width={lw_co[2]}\\lwidth] (m{pos}) -- (d{pos+1}) node [dprob] {{${_fmt3(vals[2])}$}};\n')
+    if vals[3] > 0:
+        parts.append(f'        \\draw [trans, line width={lw_co[3]}\\lwidth] (i{pos}) -- (m{pos+1}) node [prob] {{${_fmt3(vals[3])}$}};\n')
+    if vals[4] > 0:
+        parts.append(f'        \\draw [trans, line width={lw_co[4]}\\lwidth] (i{pos}) to [out=60,in=120,looseness=8] node [loopprob] {{${_fmt3(vals[4])}$}} (i{pos}) ;\n')
+    if vals[5] > 0:
+        parts.append(f'        \\draw [trans, line width={lw_co[5]}\\lwidth] (d{pos}) -- (m{pos+1}) node [dprob] {{${_fmt3(vals[5])}$}};\n')
+    if vals[6] > 0:
+        parts.append(f'        \\draw [trans, line width={lw_co[6]}\\lwidth] (d{pos}) -- (d{pos+1}) node [prob] {{${_fmt3(vals[6])}$}};\n')
+
+def draw_eprobs(parts, prob_strings, prob_colors, pos_string, pos):
+    """ Append the state emission probability table for the state correspoding
+    to position 'pos' to 'parts', given the pre-rendered probability and fill
+    strings of that state."""
+    if len(prob_strings)==20:
+        rows = [ f'            |[circle, fill={prob_colors[i]}]|{left} & ${prob_strings[i]}$ & |[circle, fill={prob_colors[i+10]}]|{right} & ${prob_strings[i+10]}$\\\\'
+                for i, (left, right) in enumerate(aa_rows) ]
+    elif len(prob_strings)==4:
+        rows = [ f'            |[circle, fill={prob_colors[i]}]|{nt} & ${prob_strings[i]}$ \\\\'
+                for i, nt in enumerate(nt_rows) ]
+    else:
+        return
+    parts.append(f'\n        \\matrix [inner sep=.05mm, outer sep=0pt, {pos_string}{pos}, matrix of nodes, '
+            'nodes={inner sep=.2mm, font=\\tiny, minimum size=1.0em}, row sep=.04mm] (m) {%\n'
+            + '\n'.join(rows)
+            + '\n        };\n        \\draw [rounded corners=.1mm] (m.south west) rectangle (m.north east);\n')
+
+
+def drawPosition(parts, hmm, pos):
+    """ Append the state nodes and emission probability tables for position 'pos' to 'parts' """
     # Anti proportional, relative entropy - low entropy -> high color intensity
     mfill = 'gray!50'
     if pos==0:
@@ -241,32 +300,34 @@ def drawPosition(out, hmm, pos):
     elif pos==len(hmm.subs):
         mtext = 'E'
     else:
-        mtext = '$m_{' + str(pos) + '}$'
-        mfill = 'mcolor!' + str(math.floor(100 * (1-hmm.norm_m_ent[pos])))
-    node_pos = '' if pos==0 else ', right=\\hdist of m' + str(pos-1)
-    out.write('        \\node[mstate, fill=' + mfill + node_pos + '] (m' + str(pos) + ') {' + mtext + '};\n')
+        mtext = f'$m_{{{pos}}}$'
+        mfill = _cfill('mcolor', hmm.m_fill[pos])
+    node_pos = '' if pos==0 else f', right=\\hdist of m{pos-1}'
+    parts.append(f'        \\node[mstate, fill={mfill}{node_pos}] (m{pos}) {{{mtext}}};\n')
     if pos<len(hmm.subs):
-        ifill = 'icolor!' + str(math.floor(100 * (1-hmm.norm_ins_ent[pos])))
-        out.write('        \\node[istate, fill = ' + ifill + ', above right=\\vdist and .5\\hdist of m' + str(pos) + '] (i' + str(pos) + ') {$i_{' + str(pos) +'}$};\n')
-        out.write('        \\node[dstate, below=\\vdist of m' + str(pos) + '] (d' + str(pos) + ') {$d_{' + str(pos) + '}$};\n')
+        ifill = _cfill('icolor', hmm.ins_fill[pos])
+        parts.append(f'        \\node[istate, fill = {ifill}, above right=\\vdist and .5\\hdist of m{pos}] (i{pos}) {{$i_{{{pos}}}$}};\n')
+        parts.append(f'        \\node[dstate, below=\\vdist of m{pos}] (d{pos}) {{$d_{{{pos}}}$}};\n')
 
     if pos > 0 and pos<len(hmm.subs):
-        draw_eprobs(out, hmm, pos, lambda x : x.m_em, "below=1.8mm of m", "mcolor")
+        draw_eprobs(parts, hmm.m_em_strs[pos-1], hmm.m_em_fills[pos-1], "below=1.8mm of m", pos)
     if pos<len(hmm.subs):
-        draw_eprobs(out, hmm, pos, lambda x : x.ins_em, "above=.8mm of i", "icolor")
+        draw_eprobs(parts, hmm.ins_em_strs[pos], hmm.ins_em_fills[pos], "above=.8mm of i", pos)
 
 def drawHMM(out, hmm):
     """ Draw an HMM given the output file object 'out' and 'hmm' """
+    parts = []
     for pos in range(1+len(hmm.subs)):
-        drawPosition(out, hmm, pos)
+        drawPosition(parts, hmm, pos)
     for pos in range(0, len(hmm.subs)):
-        drawTrans(out, hmm.subs, pos)
+        drawTrans(parts, hmm, pos)
+    out.write(''.join(parts).encode('ascii'))
 
 def checkLaTeX(pdflatex):
     """ Check if 'lualatex' can be executed and raise an exception otherwise """
     compiler = 'pdflatex' if pdflatex else 'lualatex'
     try:
-        ret = subprocess.run([compiler, '--version'], stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+        ret = subprocess.run([compiler, '--version'], stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL)
     except FileNotFoundError:
         raise NoLaTeXException()
     if ret.returncode != 0:
@@ -275,7 +336,7 @@ def checkLaTeX(pdflatex):
 def compileLaTeX(tdir, pdflatex):
     """ Compile the 'hmm.tex' file in the given directory """
     compiler = 'pdflatex' if pdflatex else 'lualatex'
-    ret = subprocess.run([compiler, '--interaction', 'batchmode', 'hmm'], cwd = tdir, stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+    ret = subprocess.run([compiler, '--interaction', 'batchmode', 'hmm'], cwd = tdir, stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL)
     if ret.returncode != 0:
         raise LaTeXException
 
@@ -288,7 +349,7 @@ def remove_temp_dir(tdir, **kwargs):
 
 def get_config():
     parser = argparse.ArgumentParser("hmmer2pdf", description="Plotting tool for HMMER3 hmm files based on TikZ")
-    parser.add_argument('infile', type = argparse.FileType('r'), nargs="?", default = sys.stdin, help = "The input HMM file to read from. Default: stdin")
+    parser.add_argument('infile', nargs="?", default = None, help = "The input HMM file to read from. Default: stdin")
     parser.add_argument('outfile', type = argparse.FileType('w'), nargs="?", default = sys.stdout, help = "The output PDF file to write to. Default: stdout")
     parser.add_argument('--pdflatex', action='store_true', help = "Use 'pdflatex' instead of 'lualatex'. WARNING - 'pdflatex' will fail on larger HMMS due to memory limits")
     return parser.parse_args()
@@ -306,8 +367,13 @@ def main():
         checkLaTeX(args.pdflatex)
 
         print("Reading HMM file...", file = sys.stderr, end = '', flush = True)
+        # Open the input with a large read buffer to reduce syscall overhead
+        if args.infile is None:
+            instream = io.TextIOWrapper(io.BufferedReader(sys.stdin.buffer.raw, buffer_size = 1<<20))
+        else:
+            instream = open(args.infile, 'r', buffering = 1<<20)
         # Parse the HMM
-        hmm = parseHMMFile(args.infile)
+        hmm = parseHMMFile(instream)
 
         # Start a LaTeX document
         tdir, out = openLaTeX()
@@ -324,11 +390,18 @@ def main():
         compileLaTeX(tdir, args.pdflatex)
 
         print(" Done.", file = sys.stderr)
-        # Copy the temporary PDF file to stdout
-        shutil.copyfileobj(open(tdir + '/hmm.pdf', 'rb'), args.outfile.buffer)
+        # Copy the temporary PDF file to the output; a real output file can be
+        # copied in kernel space via sendfile, only stdout needs a read/write loop
+        if args.outfile is sys.stdout:
+            shutil.copyfileobj(open(tdir + '/hmm.pdf', 'rb'), args.outfile.buffer, length = 1<<20)
+        else:
+            args.outfile.close()
+            shutil.copyfile(tdir + '/hmm.pdf', args.outfile.name)
 
         # Remove temporary files
         remove_temp_dir(tdir)
+    except FileNotFoundError as err:
+        print(f"\nERROR - Cannot open input file '{err.filename}'.", file = sys.stderr)
     except NoLaTeXException:
         compiler = 'pdflatex' if args.pdflatex else 'lualatex'
         print(f"\nERROR - Could not execute '{compiler}' - Do you have a LaTeX suite installed?", file = sys.stderr)